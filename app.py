@@ -3,6 +3,8 @@ Smart Post-Purchase Rules - OrderEditing companion demo.
 Main Streamlit application entry point.
 """
 
+from typing import Optional
+
 import pandas as pd
 import streamlit as st
 
@@ -12,6 +14,7 @@ from data import (
     validate_schema,
     normalize_uploaded_df,
     get_example_csv_content,
+    read_uploaded_csv,
 )
 from logic import recommendations
 from ui import (
@@ -23,16 +26,45 @@ from ui import (
     render_detail_panel,
     render_export_button,
     render_self_check,
+    frame_key,
 )
 
 
+@st.cache_data(show_spinner=False)
+def _cached_synthetic_orders(n_rows: int, seed: int) -> pd.DataFrame:
+    """Synthetic orders, cached per (n_rows, seed) across reruns."""
+    return generate_synthetic_orders(n_rows, seed)
+
+
+@st.cache_data(
+    show_spinner=False,
+    max_entries=16,
+    hash_funcs={pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).sum()},
+)
+def _cached_recommendations(
+    df: pd.DataFrame, config: dict
+) -> tuple[pd.DataFrame, dict, int]:
+    """
+    Recommendations, cached on input data and config across reruns.
+    Also returns frame_key(df_rec), so the hash is only paid on a cache miss.
+    """
+    df_rec, summary = recommendations(df, config)
+    return df_rec, summary, frame_key(df_rec)
+
+
+@st.cache_data(show_spinner=False)
+def _cached_example_csv() -> str:
+    """Example template CSV, built once per session."""
+    return get_example_csv_content()
+
+
 def _get_or_create_data() -> tuple[pd.DataFrame, str]:
     """
     Determine data source: synthetic or CSV upload.
     Returns (df, source) where source is 'synthetic' or 'upload'.
     """
     if "synthetic_df" not in st.session_state:
-        st.session_state.synthetic_df = generate_synthetic_orders(200, 42)
+        st.session_state.synthetic_df = _cached_synthetic_orders(200, 42)
 
     source = st.radio(
         "Data source",
@@ -44,7 +76,7 @@ def _get_or_create_data() -> tuple[pd.DataFrame, str]:
 
     if source == "Generate synthetic dataset":
         if st.button("Generate synthetic data", key="btn_generate_synthetic"):
-            st.session_state.synthetic_df = generate_synthetic_orders(200, 42)
+            st.session_state.synthetic_df = _cached_synthetic_orders(200, 42)
             st.rerun()
         return st.session_state.synthetic_df, "synthetic"
 
@@ -55,7 +87,7 @@ def _get_or_create_data() -> tuple[pd.DataFrame, str]:
         return pd.DataFrame(), "upload"
 
     try:
-        raw_df = pd.read_csv(uploaded)
+        raw_df = read_uploaded_csv(uploaded)
     except Exception as e:
         st.error(f"Could not parse CSV: {e}")
         return pd.DataFrame(), "upload"
@@ -74,29 +106,71 @@ def _get_or_create_data() -> tuple[pd.DataFrame, str]:
             st.error(err)
         st.download_button(
             "Download example template",
-            data=get_example_csv_content(),
+            data=_cached_example_csv(),
             file_name="order_template.csv",
             mime="text/csv",
             key="download_template_btn",
         )
         return pd.DataFrame(), "upload"
 
-    # Show mapping UI
+    # Reuse a saved mapping for uploads with the same columns
+    upload_key = tuple(raw_df.columns)
+    same_upload = st.session_state.get("column_map_key") == upload_key
+    saved_map = st.session_state.get("column_map")
+    if saved_map is not None and same_upload:
+        st.caption("Using saved column mapping.")
+        if st.button("Edit column mapping", key="btn_edit_mapping"):
+            # Keep the previous choices to pre-fill the mapping UI
+            st.session_state["column_map_last"] = st.session_state.pop("column_map")
+            st.rerun()
+        column_map = saved_map
+    else:
+        last_map = st.session_state.get("column_map_last") if same_upload else None
+        column_map = _render_column_mapping(upload_key, last_map)
+        if column_map is None:
+            return pd.DataFrame(), "upload"
+
+    norm_df = normalize_uploaded_df(raw_df, column_map)
+    valid, errs = validate_schema(norm_df)
+    if not valid:
+        for err in errs:
+            st.error(err)
+        return pd.DataFrame(), "upload"
+
+    st.session_state["column_map"] = column_map
+    st.session_state["column_map_key"] = upload_key
+    return norm_df, "upload"
+
+
+@st.cache_data(show_spinner=False)
+def _upload_col_options(upload_cols: tuple[str, ...]) -> list[str]:
+    """Selectbox options for the column mapping UI."""
+    return ["(Skip)"] + list(upload_cols)
+
+
+def _render_column_mapping(
+    upload_cols: tuple[str, ...],
+    last_map: Optional[dict[str, str]] = None,
+) -> Optional[dict[str, str]]:
+    """
+    Render the column mapping UI, pre-filled from last_map when given.
+    Returns internal name -> uploaded column mapping once the user confirms
+    it, or None if incomplete or not yet confirmed.
+    """
     st.subheader("Column mapping")
     st.caption("Map your CSV columns to the expected schema.")
-    upload_cols = ["(Skip)"] + list(raw_df.columns)
+    options = _upload_col_options(upload_cols)
     column_map: dict[str, str] = {}
 
     for internal in REQUIRED_COLUMNS:
         idx = 0
-        if internal in raw_df.columns:
-            try:
-                idx = upload_cols.index(internal)
-            except ValueError:
-                pass
+        if last_map and last_map.get(internal) in upload_cols:
+            idx = options.index(last_map[internal])
+        elif internal in upload_cols:
+            idx = options.index(internal)
         chosen = st.selectbox(
             f"{internal}",
-            options=upload_cols,
+            options=options,
             index=idx,
             key=f"map_{internal}",
         )
@@ -108,21 +182,17 @@ def _get_or_create_data() -> tuple[pd.DataFrame, str]:
         st.error(f"Missing required columns: {', '.join(missing)}")
         st.download_button(
             "Download example template",
-            data=get_example_csv_content(),
+            data=_cached_example_csv(),
             file_name="order_template.csv",
             mime="text/csv",
             key="download_template_btn2",
         )
-        return pd.DataFrame(), "upload"
+        return None
 
-    norm_df = normalize_uploaded_df(raw_df, column_map)
-    valid, errs = validate_schema(norm_df)
-    if not valid:
-        for err in errs:
-            st.error(err)
-        return pd.DataFrame(), "upload"
-
-    return norm_df, "upload"
+    if not st.button("Use this mapping", key="btn_use_mapping"):
+        st.info("Review the mapping above, then click **Use this mapping**.")
+        return None
+    return column_map
 
 
 def _inject_icon_fix_css() -> None:
@@ -168,7 +238,7 @@ def main() -> None:
 
     # Compute recommendations
     try:
-        df_rec, summary = recommendations(df, config)
+        df_rec, summary, rec_key = _cached_recommendations(df, config)
     except Exception as e:
         st.error(f"Recommendation error: {e}")
         st.stop()
@@ -198,12 +268,12 @@ def main() -> None:
         sort_asc = st.checkbox("Sort window ascending", value=False, key="sort_asc")
 
     selected_order = render_recommendations_table(
-        df_rec, filter_customer, filter_upsell, sort_asc
+        df_rec, filter_customer, filter_upsell, sort_asc, rec_key
     )
     if selected_order:
-        render_detail_panel(df_rec, selected_order)
+        render_detail_panel(df_rec, selected_order, rec_key)
 
-    render_export_button(df_rec)
+    render_export_button(df_rec, rec_key)
     render_self_check(df_rec)
 
 
@@ -3,9 +3,11 @@ Synthetic order data generation for Smart Post-Purchase Rules demo.
 Creates deterministic, realistic demo data with a fixed random seed.
 """
 
-from typing import Any
+from typing import Any, BinaryIO
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
 
 REQUIRED_COLUMNS = [
     "order_id",
@@ -22,6 +24,28 @@ REQUIRED_COLUMNS = [
 # Valid values for categorical columns
 CUSTOMER_TYPES = ("first_time", "repeat", "vip")
 SHIPPING_SPEEDS = ("standard", "express")
+CUSTOMER_TYPE_DTYPE = pd.CategoricalDtype(CUSTOMER_TYPES)
+SHIPPING_SPEED_DTYPE = pd.CategoricalDtype(SHIPPING_SPEEDS)
+
+# Arrow types for required columns when reading uploads
+UPLOAD_COLUMN_TYPES = {
+    "order_id": pa.string(),
+    "customer_type": pa.string(),
+    "order_value": pa.float64(),
+    "discount_used": pa.int8(),
+    "past_edits": pa.int8(),
+    "past_cancels": pa.int8(),
+    "shipping_speed": pa.string(),
+    "minutes_since_checkout": pa.int16(),
+    "address_change_requests": pa.int8(),
+}
+
+
+def _draw_codes(rng: np.random.Generator, probs: list[float], size: int) -> np.ndarray:
+    """Draw int8 category codes 0..len(probs)-1 with the given probabilities."""
+    cdf = np.cumsum(probs)
+    codes = np.searchsorted(cdf, rng.random(size), side="right")
+    return np.minimum(codes, len(probs) - 1).astype(np.int8)
 
 
 def generate_synthetic_orders(n_rows: int = 200, seed: int = 42) -> pd.DataFrame:
@@ -42,43 +66,39 @@ def generate_synthetic_orders(n_rows: int = 200, seed: int = 42) -> pd.DataFrame
 
     # Customer types: more first_time/repeat, few vip (realistic)
     customer_type_probs = [0.45, 0.45, 0.10]  # first_time, repeat, vip
-    customer_types = rng.choice(CUSTOMER_TYPES, size=n_rows, p=customer_type_probs)
+    customer_types = _draw_codes(rng, customer_type_probs, n_rows)
 
     # Order value: skewed toward lower values
     order_values = np.clip(rng.exponential(scale=50, size=n_rows) + 15, 10, 500)
 
     # Discount used: 0 or 1
-    discount_used = rng.choice([0, 1], size=n_rows, p=[0.7, 0.3])
+    discount_used = (rng.random(n_rows) < 0.3).astype(np.int8)
 
     # Past edits: mostly 0, some 1–2, rare 3+
-    past_edits = rng.choice([0, 1, 2, 3], size=n_rows, p=[0.6, 0.25, 0.12, 0.03])
+    past_edits = _draw_codes(rng, [0.6, 0.25, 0.12, 0.03], n_rows)
 
     # Past cancels: mostly 0
-    past_cancels = rng.choice([0, 1, 2], size=n_rows, p=[0.85, 0.12, 0.03])
+    past_cancels = _draw_codes(rng, [0.85, 0.12, 0.03], n_rows)
 
     # Shipping speed: more standard than express
-    shipping_speed = rng.choice(
-        SHIPPING_SPEEDS, size=n_rows, p=[0.75, 0.25]
-    )
+    shipping_speed = _draw_codes(rng, [0.75, 0.25], n_rows)
 
     # Minutes since checkout: 0–90
     minutes_since_checkout = rng.integers(0, 91, size=n_rows)
 
     # Address change requests: mostly 0
-    address_change_requests = rng.choice(
-        [0, 1, 2], size=n_rows, p=[0.92, 0.06, 0.02]
-    )
+    address_change_requests = _draw_codes(rng, [0.92, 0.06, 0.02], n_rows)
 
     df = pd.DataFrame(
         {
             "order_id": order_ids,
-            "customer_type": customer_types,
+            "customer_type": pd.Categorical.from_codes(customer_types, dtype=CUSTOMER_TYPE_DTYPE),
             "order_value": np.round(order_values, 2),
-            "discount_used": discount_used.astype(int),
+            "discount_used": discount_used,
             "past_edits": past_edits,
             "past_cancels": past_cancels,
-            "shipping_speed": shipping_speed,
-            "minutes_since_checkout": minutes_since_checkout,
+            "shipping_speed": pd.Categorical.from_codes(shipping_speed, dtype=SHIPPING_SPEED_DTYPE),
+            "minutes_since_checkout": minutes_since_checkout.astype(np.int16),
             "address_change_requests": address_change_requests,
         }
     )
@@ -109,13 +129,13 @@ def validate_schema(df: pd.DataFrame) -> tuple[bool, list[str]]:
     # Basic type/value checks
     if not pd.api.types.is_numeric_dtype(df["order_value"]):
         errors.append("order_value must be numeric.")
+    elif not np.isfinite(df["order_value"].dropna().to_numpy(dtype=float)).all():
+        errors.append("order_value must be finite.")
 
-    valid_customer = set(CUSTOMER_TYPES)
-    if not set(df["customer_type"].dropna().unique()).issubset(valid_customer):
+    if not df["customer_type"].dropna().isin(CUSTOMER_TYPES).all():
         errors.append(f"customer_type must be one of: {CUSTOMER_TYPES}")
 
-    valid_speed = set(SHIPPING_SPEEDS)
-    if not set(df["shipping_speed"].dropna().unique()).issubset(valid_speed):
+    if not df["shipping_speed"].dropna().isin(SHIPPING_SPEEDS).all():
         errors.append(f"shipping_speed must be one of: {SHIPPING_SPEEDS}")
 
     if errors:
@@ -124,6 +144,49 @@ def validate_schema(df: pd.DataFrame) -> tuple[bool, list[str]]:
     return True, []
 
 
+def read_uploaded_csv(source: BinaryIO) -> pd.DataFrame:
+    """
+    Read an uploaded CSV, using the Arrow reader with the known schema.
+
+    Falls back to the pandas parser when Arrow rejects the file (e.g. a
+    value that does not fit the declared column type) or the header
+    repeats a column name.
+
+    Args:
+        source: Binary file-like object positioned at the start of the CSV.
+
+    Returns:
+        Raw DataFrame with the file's original column names.
+    """
+    try:
+        table = pac.read_csv(
+            source,
+            convert_options=pac.ConvertOptions(column_types=UPLOAD_COLUMN_TYPES),
+        )
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pd.read_csv(source)
+    if len(set(table.column_names)) != len(table.column_names):
+        # pandas de-duplicates repeated headers (order_id, order_id.1)
+        source.seek(0)
+        return pd.read_csv(source)
+    return table.to_pandas()
+
+
+def _to_int(values: pd.Series) -> pd.Series:
+    """Coerce to the smallest fitting integer dtype (invalid/missing -> 0)."""
+    if not pd.api.types.is_integer_dtype(values) or values.hasnans:
+        values = pd.to_numeric(values, errors="coerce").fillna(0).astype(int)
+    return pd.to_numeric(values, downcast="integer")
+
+
+def _to_category(values: pd.Series, dtype: pd.CategoricalDtype) -> pd.Series:
+    """Cast to a categorical dtype, leaving invalid columns as-is for validation."""
+    if not values.isin(dtype.categories).all():
+        return values
+    return values.astype(dtype)
+
+
 def normalize_uploaded_df(
     df: pd.DataFrame, column_map: dict[str, str]
 ) -> pd.DataFrame:
@@ -148,22 +211,28 @@ def normalize_uploaded_df(
     if "order_value" in result.columns:
         result["order_value"] = pd.to_numeric(result["order_value"], errors="coerce").fillna(0)
     if "discount_used" in result.columns:
-        result["discount_used"] = pd.to_numeric(result["discount_used"], errors="coerce").fillna(0).astype(int)
+        result["discount_used"] = _to_int(result["discount_used"])
     if "past_edits" in result.columns:
-        result["past_edits"] = pd.to_numeric(result["past_edits"], errors="coerce").fillna(0).astype(int)
+        result["past_edits"] = _to_int(result["past_edits"])
     if "past_cancels" in result.columns:
-        result["past_cancels"] = pd.to_numeric(result["past_cancels"], errors="coerce").fillna(0).astype(int)
+        result["past_cancels"] = _to_int(result["past_cancels"])
     if "minutes_since_checkout" in result.columns:
-        result["minutes_since_checkout"] = pd.to_numeric(result["minutes_since_checkout"], errors="coerce").fillna(0).astype(int)
+        result["minutes_since_checkout"] = _to_int(result["minutes_since_checkout"])
     if "address_change_requests" in result.columns:
-        result["address_change_requests"] = pd.to_numeric(result["address_change_requests"], errors="coerce").fillna(0).astype(int)
+        result["address_change_requests"] = _to_int(result["address_change_requests"])
 
     if "order_id" in result.columns:
         result["order_id"] = result["order_id"].astype(str)
     if "customer_type" in result.columns:
-        result["customer_type"] = result["customer_type"].astype(str).str.lower().str.strip()
+        result["customer_type"] = _to_category(
+            result["customer_type"].astype(str).str.lower().str.strip(),
+            CUSTOMER_TYPE_DTYPE,
+        )
     if "shipping_speed" in result.columns:
-        result["shipping_speed"] = result["shipping_speed"].astype(str).str.lower().str.strip()
+        result["shipping_speed"] = _to_category(
+            result["shipping_speed"].astype(str).str.lower().str.strip(),
+            SHIPPING_SPEED_DTYPE,
+        )
 
     return result
 
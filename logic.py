@@ -7,138 +7,180 @@ from typing import Any
 import pandas as pd
 import numpy as np
 
+from data import (
+    CUSTOMER_TYPES,
+    SHIPPING_SPEEDS,
+    CUSTOMER_TYPE_DTYPE,
+    SHIPPING_SPEED_DTYPE,
+)
+
 # Valid window options (minutes)
 VALID_WINDOWS = (10, 15, 20, 25, 30)
+_SORTED_WINDOWS = np.array(sorted(VALID_WINDOWS), dtype=np.int16)
 
 INDUSTRIES = ("Apparel", "Beauty", "Electronics", "Supplements")
 
+# Minimum order value for an industry-threshold upsell
+_INDUSTRY_UPSELL_MIN = {"Apparel": 60.0, "Electronics": 120.0}
+
+# Category codes for rule comparisons
+_FIRST_TIME = CUSTOMER_TYPES.index("first_time")
+_VIP = CUSTOMER_TYPES.index("vip")
+_EXPRESS = SHIPPING_SPEEDS.index("express")
+
+# Explanation reasons, in priority order
+_REASONS = np.array(
+    [
+        "VIP: shorter window",
+        "First-time + discount: extended window",
+        "High past edits: extended window",
+        "Express shipping: shorter window",
+        "High value + returning: upsell",
+        "Apparel threshold: upsell",
+        "Electronics threshold: upsell",
+        "Lock early: fraud-risk",
+        "Strict address: risk factors",
+    ]
+)
+
+
+def _int_values(values: pd.Series) -> np.ndarray:
+    """Integer column as an array (invalid/missing -> 0), keeping narrow int dtypes."""
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        return values.to_numpy()
+    return pd.to_numeric(values, errors="coerce").fillna(0).astype(int).to_numpy()
+
+
+def _category_codes(
+    values: pd.Series, dtype: pd.CategoricalDtype, default: str
+) -> np.ndarray:
+    """
+    Category codes for values (missing -> default, unknown -> -1).
+    Columns already in dtype skip the string normalization pass.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if values.cat.categories.equals(dtype.categories):
+            return values.fillna(default).cat.codes.to_numpy()
+        values = values.astype(object)
+    values = values.fillna(default).astype(str).str.lower().astype(dtype)
+    return values.cat.codes.to_numpy()
+
 
-def _clamp_window(val: float) -> int:
-    """Clamp suggested window to nearest valid option (10–30)."""
-    for w in sorted(VALID_WINDOWS):
-        if val <= w:
-            return w
-    return 30
+def _clamp_window(val: np.ndarray) -> np.ndarray:
+    """Clamp suggested windows to nearest valid option (10–30)."""
+    idx = np.searchsorted(_SORTED_WINDOWS, val)
+    return _SORTED_WINDOWS[np.minimum(idx, len(_SORTED_WINDOWS) - 1)]
 
 
 def _compute_window(
     base: int,
-    customer_type: str,
-    discount_used: int,
-    past_edits: int,
-    shipping_speed: str,
-) -> int:
-    """Compute suggested edit window for a single row."""
-    w = float(base)
-    if customer_type == "vip":
-        w -= 5
-    if customer_type == "first_time" and discount_used == 1:
-        w += 5
-    if past_edits >= 2:
-        w += 5
-    if shipping_speed == "express":
-        w -= 5
-    return _clamp_window(max(10, w))
+    customer_type: np.ndarray,
+    discount_used: np.ndarray,
+    past_edits: np.ndarray,
+    shipping_speed: np.ndarray,
+) -> np.ndarray:
+    """Compute suggested edit windows for all rows."""
+    w = np.full(len(customer_type), base, dtype=np.float32)
+    w -= 5 * (customer_type == _VIP)
+    w += 5 * ((customer_type == _FIRST_TIME) & (discount_used == 1))
+    w += 5 * (past_edits >= 2)
+    w -= 5 * (shipping_speed == _EXPRESS)
+    return _clamp_window(w)
 
 
 def _compute_upsell(
-    order_value: float,
-    customer_type: str,
-    shipping_speed: str,
+    order_value: np.ndarray,
+    customer_type: np.ndarray,
+    shipping_speed: np.ndarray,
     industry: str,
     enable_upsell: bool,
-) -> str:
-    """Determine if upsell should be shown."""
-    if not enable_upsell or shipping_speed == "express":
-        return "No"
+) -> np.ndarray:
+    """Determine which rows should show an upsell."""
+    if not enable_upsell:
+        return np.zeros(len(order_value), dtype=bool)
 
-    if order_value >= 80 and customer_type != "first_time":
-        return "Yes"
-    if industry == "Apparel" and order_value >= 60:
-        return "Yes"
-    if industry == "Electronics" and order_value >= 120:
-        return "Yes"
+    mask = (order_value >= 80) & (customer_type != _FIRST_TIME)
+    if industry in _INDUSTRY_UPSELL_MIN:
+        mask |= order_value >= _INDUSTRY_UPSELL_MIN[industry]
 
-    return "No"
+    return mask & (shipping_speed != _EXPRESS)
 
 
 def _compute_strict_address(
-    address_change_requests: int,
-    customer_type: str,
+    address_change_requests: np.ndarray,
+    customer_type: np.ndarray,
     conservative: bool,
-) -> str:
-    """Determine if strict address validation should be enabled."""
-    if conservative and customer_type == "first_time":
-        return "Yes"
-    if address_change_requests >= 1 or customer_type == "first_time":
-        return "Yes"
-    return "No"
+) -> np.ndarray:
+    """Determine which rows need strict address validation."""
+    first_time = customer_type == _FIRST_TIME
+    mask = (address_change_requests >= 1) | first_time
+    if conservative:
+        mask |= first_time
+    return mask
 
 
 def _compute_lock_early(
-    customer_type: str,
-    discount_used: int,
-    address_change_requests: int,
-    past_cancels: int,
+    customer_type: np.ndarray,
+    discount_used: np.ndarray,
+    address_change_requests: np.ndarray,
+    past_cancels: np.ndarray,
     conservative: bool,
-) -> str:
-    """Determine if order should be locked early."""
+) -> np.ndarray:
+    """Determine which orders should be locked early."""
+    mask = (
+        (customer_type == _FIRST_TIME)
+        & (discount_used == 1)
+        & (address_change_requests >= 1)
+    )
+    mask |= past_cancels >= 2
     if conservative:
-        if past_cancels >= 2 or address_change_requests >= 2:
-            return "Yes"
-
-    if (customer_type == "first_time" and discount_used == 1 and address_change_requests >= 1):
-        return "Yes"
-    if past_cancels >= 2:
-        return "Yes"
-
-    return "No"
+        mask |= (past_cancels >= 2) | (address_change_requests >= 2)
+    return mask
 
 
 def _build_explanation(
-    window: int,
-    upsell: str,
-    strict_addr: str,
-    lock: str,
-    customer_type: str,
-    discount_used: int,
-    past_edits: int,
-    shipping_speed: str,
-    order_value: float,
+    upsell: np.ndarray,
+    strict_addr: np.ndarray,
+    lock: np.ndarray,
+    customer_type: np.ndarray,
+    discount_used: np.ndarray,
+    past_edits: np.ndarray,
+    shipping_speed: np.ndarray,
+    order_value: np.ndarray,
     industry: str,
-    enable_upsell: bool,
-) -> str:
-    """Build short explanation (top 2 reasons) for the recommendations."""
-    reasons: list[str] = []
-
-    # Window reasons
-    if customer_type == "vip":
-        reasons.append("VIP: shorter window")
-    if customer_type == "first_time" and discount_used == 1:
-        reasons.append("First-time + discount: extended window")
-    if past_edits >= 2:
-        reasons.append("High past edits: extended window")
-    if shipping_speed == "express":
-        reasons.append("Express shipping: shorter window")
-
-    # Upsell reasons
-    if upsell == "Yes" and enable_upsell:
-        if shipping_speed == "express":
-            pass  # wouldn't be Yes
-        elif order_value >= 80 and customer_type != "first_time":
-            reasons.append("High value + returning: upsell")
-        elif industry == "Apparel" and order_value >= 60:
-            reasons.append("Apparel threshold: upsell")
-        elif industry == "Electronics" and order_value >= 120:
-            reasons.append("Electronics threshold: upsell")
-
-    # Lock / strict reasons
-    if lock == "Yes":
-        reasons.append("Lock early: fraud-risk")
-    if strict_addr == "Yes":
-        reasons.append("Strict address: risk factors")
-
-    return "; ".join(reasons[:2]) if reasons else "Standard rules applied"
+) -> np.ndarray:
+    """Build short explanations (top 2 reasons) for all rows."""
+    # Upsell reasons: high-value takes precedence over industry thresholds
+    upsell_hv = upsell & (order_value >= 80) & (customer_type != _FIRST_TIME)
+    upsell_industry = upsell & ~upsell_hv
+    upsell_apparel = upsell_industry & (industry == "Apparel") & (order_value >= 60)
+    upsell_electronics = (
+        upsell_industry & (industry == "Electronics") & (order_value >= 120)
+    )
+
+    # One column per entry in _REASONS, in priority order
+    active = np.column_stack(
+        [
+            customer_type == _VIP,
+            (customer_type == _FIRST_TIME) & (discount_used == 1),
+            past_edits >= 2,
+            shipping_speed == _EXPRESS,
+            upsell_hv,
+            upsell_apparel,
+            upsell_electronics,
+            lock,
+            strict_addr,
+        ]
+    )
+    top = np.argsort(~active, axis=1, kind="stable")[:, :2]
+    first, second = _REASONS[top[:, 0]], _REASONS[top[:, 1]]
+    count = active.sum(axis=1)
+
+    return np.where(
+        count >= 2,
+        np.char.add(np.char.add(first, "; "), second),
+        np.where(count == 1, first, "Standard rules applied"),
+    )
 
 
 def recommendations(
@@ -174,63 +216,49 @@ def recommendations(
         }
 
     # Safely access columns with defaults
-    customer_type = df["customer_type"].fillna("first_time").astype(str).str.lower()
-    order_value = pd.to_numeric(df["order_value"], errors="coerce").fillna(0)
-    discount_used = pd.to_numeric(df["discount_used"], errors="coerce").fillna(0).astype(int)
-    past_edits = pd.to_numeric(df["past_edits"], errors="coerce").fillna(0).astype(int)
-    past_cancels = pd.to_numeric(df["past_cancels"], errors="coerce").fillna(0).astype(int)
-    shipping_speed = df["shipping_speed"].fillna("standard").astype(str).str.lower()
-    minutes_since = pd.to_numeric(df["minutes_since_checkout"], errors="coerce").fillna(0).astype(int)
-    addr_changes = pd.to_numeric(df["address_change_requests"], errors="coerce").fillna(0).astype(int)
-
-    # Compute per-row
-    windows = []
-    upsells = []
-    strict_addrs = []
-    lock_earlys = []
-    explanations = []
-
-    for i in range(len(df)):
-        ct = customer_type.iloc[i] if i < len(customer_type) else "first_time"
-        ov = float(order_value.iloc[i]) if i < len(order_value) else 0.0
-        du = int(discount_used.iloc[i]) if i < len(discount_used) else 0
-        pe = int(past_edits.iloc[i]) if i < len(past_edits) else 0
-        pc = int(past_cancels.iloc[i]) if i < len(past_cancels) else 0
-        ss = str(shipping_speed.iloc[i]) if i < len(shipping_speed) else "standard"
-        ac = int(addr_changes.iloc[i]) if i < len(addr_changes) else 0
-
-        w = _compute_window(base, ct, du, pe, ss)
-        u = _compute_upsell(ov, ct, ss, industry, enable_upsell)
-        sa = _compute_strict_address(ac, ct, conservative)
-        le = _compute_lock_early(ct, du, ac, pc, conservative)
-        exp = _build_explanation(
-            w, u, sa, le, ct, du, pe, ss, ov, industry, enable_upsell
-        )
-
-        windows.append(w)
-        upsells.append(u)
-        strict_addrs.append(sa)
-        lock_earlys.append(le)
-        explanations.append(exp)
-
-    out = df.copy()
-    out["suggested_edit_window_minutes"] = windows
-    out["show_upsell"] = upsells
-    out["strict_address_validation"] = strict_addrs
-    out["lock_order_early"] = lock_earlys
-    out["explanation"] = explanations
-
-    # Window expired
-    out["window_expired"] = minutes_since > np.array(windows)
+    ct = _category_codes(df["customer_type"], CUSTOMER_TYPE_DTYPE, "first_time")
+    ov = pd.to_numeric(df["order_value"], errors="coerce").fillna(0).to_numpy()
+    du = _int_values(df["discount_used"])
+    pe = _int_values(df["past_edits"])
+    pc = _int_values(df["past_cancels"])
+    ss = _category_codes(df["shipping_speed"], SHIPPING_SPEED_DTYPE, "standard")
+    minutes_since = _int_values(df["minutes_since_checkout"])
+    ac = _int_values(df["address_change_requests"])
+
+    # Compute all rows at once
+    windows = _compute_window(base, ct, du, pe, ss)
+    upsells = _compute_upsell(ov, ct, ss, industry, enable_upsell)
+    strict_addrs = _compute_strict_address(ac, ct, conservative)
+    lock_earlys = _compute_lock_early(ct, du, ac, pc, conservative)
+    explanations = _build_explanation(
+        upsells, strict_addrs, lock_earlys, ct, du, pe, ss, ov, industry
+    )
+
+    new_cols = pd.DataFrame(
+        {
+            "suggested_edit_window_minutes": windows,
+            "show_upsell": upsells,
+            "strict_address_validation": strict_addrs,
+            "lock_order_early": lock_earlys,
+            "explanation": explanations,
+            "window_expired": minutes_since > windows,
+        },
+        index=df.index,
+    )
+    # Join without deep-copying the input; replace any stale output columns
+    stale = df.columns.intersection(new_cols.columns)
+    if len(stale):
+        df = df.drop(columns=stale)
+    out = pd.concat([df, new_cols], axis=1, copy=False)
 
     # Summary
     n = len(out)
     summary = {
         "total_orders": n,
-        "pct_upsell": (out["show_upsell"] == "Yes").sum() / n * 100 if n else 0.0,
+        "pct_upsell": float(out["show_upsell"].mean()) * 100 if n else 0.0,
         "avg_window": float(out["suggested_edit_window_minutes"].mean()) if n else 0.0,
-        "pct_lock_early": (out["lock_order_early"] == "Yes").sum() / n * 100 if n else 0.0,
-        "pct_strict_addr": (out["strict_address_validation"] == "Yes").sum() / n * 100 if n else 0.0,
+        "pct_lock_early": float(out["lock_order_early"].mean()) * 100 if n else 0.0,
+        "pct_strict_addr": float(out["strict_address_validation"].mean()) * 100 if n else 0.0,
     }
 
     return out, summary
@@ -0,0 +1,43 @@
+"""
+Tests for data loading and normalization.
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import (  # noqa: E402
+    REQUIRED_COLUMNS,
+    generate_synthetic_orders,
+    normalize_uploaded_df,
+    read_uploaded_csv,
+    validate_schema,
+)
+
+
+def test_read_uploaded_csv_renames_duplicate_headers():
+    csv = generate_synthetic_orders(5, seed=1).to_csv(index=False)
+    header, *rows = csv.splitlines()
+    dup_csv = "\n".join([header + ",order_id"] + [r + ",X" for r in rows]) + "\n"
+
+    raw_df = read_uploaded_csv(io.BytesIO(dup_csv.encode()))
+
+    assert list(raw_df.columns) == REQUIRED_COLUMNS + ["order_id.1"]
+    norm_df = normalize_uploaded_df(raw_df, {c: c for c in REQUIRED_COLUMNS})
+    assert validate_schema(norm_df) == (True, [])
+    assert norm_df["order_id"].tolist() == [f"ORD-{i:04d}" for i in range(1, 6)]
+
+
+def test_order_value_keeps_cents_for_large_amounts():
+    csv = generate_synthetic_orders(2, seed=1).to_csv(index=False)
+    header, first, second = csv.splitlines()
+    fields = first.split(",")
+    fields[REQUIRED_COLUMNS.index("order_value")] = "150000.01"
+    big_csv = "\n".join([header, ",".join(fields), second]) + "\n"
+
+    raw_df = read_uploaded_csv(io.BytesIO(big_csv.encode()))
+    norm_df = normalize_uploaded_df(raw_df, {c: c for c in REQUIRED_COLUMNS})
+
+    assert norm_df["order_value"].iloc[0] == 150000.01
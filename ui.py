@@ -2,10 +2,57 @@
 UI components for Smart Post-Purchase Rules demo.
 """
 
+import io
 from typing import Any, Optional
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pac
 import streamlit as st
 
+# Boolean recommendation columns, shown as Yes/No
+FLAG_COLUMNS = ("show_upsell", "strict_address_validation", "lock_order_early")
+
+# Max rows shown in the recommendations table
+MAX_TABLE_ROWS = 500
+
+# Show order_value as currency
+_COLUMN_CONFIG = {"order_value": st.column_config.NumberColumn(format="%.2f")}
+
+
+def frame_key(df: pd.DataFrame) -> int:
+    """Content hash of df, used to key per-session caches of derived data."""
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+def _order_lookup(
+    df: pd.DataFrame, data_key: Optional[int]
+) -> tuple[list[str], dict[str, int]]:
+    """
+    Drill-down options and order_id -> row position map for df.
+    Cached in session state per recommendations frame.
+    """
+    if data_key is None:
+        data_key = frame_key(df)
+    if st.session_state.get("_oid_key") != data_key:
+        oids = df["order_id"].astype(str).to_numpy()
+        first = ~pd.Series(oids).duplicated().to_numpy()
+        oid_map = dict(zip(oids[first].tolist(), np.flatnonzero(first).tolist()))
+        st.session_state["_oid_list"] = ["(Select an order)"] + list(oid_map)
+        st.session_state["_oid_map"] = oid_map
+        st.session_state["_oid_key"] = data_key
+    return st.session_state["_oid_list"], st.session_state["_oid_map"]
+
+
+def _format_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of df with boolean flag columns rendered as Yes/No."""
+    flags = {
+        col: np.where(df[col].to_numpy(dtype=bool), "Yes", "No")
+        for col in FLAG_COLUMNS
+        if col in df.columns
+    }
+    return df.assign(**flags)
+
 
 def render_sidebar(config: dict[str, Any]) -> dict[str, Any]:
     """
@@ -78,7 +125,12 @@ def render_data_preview(df: pd.DataFrame, title: str = "Data preview") -> None:
         return
     st.subheader(title)
     display_cols = [c for c in df.columns if c not in ("explanation",)]
-    st.dataframe(df[display_cols].head(10), use_container_width=True, hide_index=True)
+    st.dataframe(
+        df.head(10)[display_cols],
+        use_container_width=True,
+        hide_index=True,
+        column_config=_COLUMN_CONFIG,
+    )
 
 
 def render_recommendations_table(
@@ -86,9 +138,11 @@ def render_recommendations_table(
     filter_customer: Optional[str],
     filter_upsell: Optional[str],
     sort_asc: bool,
+    data_key: Optional[int] = None,
 ) -> Optional[str]:
     """
     Render recommendations table with filters and sort.
+    data_key is frame_key(df), if the caller already has it.
     Returns selected order_id for drill-down, or None.
     """
     if df is None or df.empty:
@@ -106,21 +160,31 @@ def render_recommendations_table(
         "window_expired",
     ]
     rec_cols = [c for c in rec_cols if c in df.columns]
-    work = df[rec_cols].copy()
 
+    mask = np.ones(len(df), dtype=bool)
     if filter_customer and filter_customer != "All":
-        work = work[work["customer_type"] == filter_customer]
+        mask &= (df["customer_type"] == filter_customer).to_numpy()
     if filter_upsell and filter_upsell != "All":
-        work = work[work["show_upsell"] == filter_upsell]
+        mask &= df["show_upsell"].to_numpy() == (filter_upsell == "Yes")
 
-    work = work.sort_values(
-        "suggested_edit_window_minutes", ascending=sort_asc
-    ).reset_index(drop=True)
+    work = df.loc[mask, rec_cols]
+    n_matching = len(work)
+    if sort_asc:
+        work = work.nsmallest(MAX_TABLE_ROWS, "suggested_edit_window_minutes")
+    else:
+        work = work.nlargest(MAX_TABLE_ROWS, "suggested_edit_window_minutes")
 
     st.subheader("Recommendations")
-    st.dataframe(work, use_container_width=True, hide_index=True)
+    if n_matching > len(work):
+        st.caption(f"Showing {len(work)} of {n_matching} matching orders.")
+    st.dataframe(
+        _format_flags(work),
+        use_container_width=True,
+        hide_index=True,
+        column_config=_COLUMN_CONFIG,
+    )
 
-    order_ids = ["(Select an order)"] + list(df["order_id"].astype(str).unique())
+    order_ids, _ = _order_lookup(df, data_key)
     selected = st.selectbox(
         "Select order for details",
         options=order_ids,
@@ -134,17 +198,19 @@ def render_recommendations_table(
 def render_detail_panel(
     df: pd.DataFrame,
     order_id: str,
+    data_key: Optional[int] = None,
 ) -> None:
     """Render row-level drill-down panel for selected order."""
     if df is None or df.empty or not order_id:
         return
 
-    row = df[df["order_id"].astype(str) == str(order_id)]
-    if row.empty:
+    _, oid_map = _order_lookup(df, data_key)
+    idx = oid_map.get(str(order_id))
+    if idx is None:
         st.warning(f"Order {order_id} not found.")
         return
 
-    row = row.iloc[0]
+    row = df.iloc[idx]
 
     st.subheader("Order details")
     with st.expander("Raw fields", expanded=True):
@@ -160,13 +226,17 @@ def render_detail_panel(
             "address_change_requests",
         ]
         for col in raw_cols:
-            if col in row.index:
+            if col == "order_value" and col in row.index:
+                st.text(f"{col}: {row[col]:.2f}")
+            elif col in row.index:
                 st.text(f"{col}: {row[col]}")
 
     with st.expander("Recommended actions", expanded=True):
-        for col in ["suggested_edit_window_minutes", "show_upsell", "strict_address_validation", "lock_order_early"]:
+        if "suggested_edit_window_minutes" in row.index:
+            st.text(f"suggested_edit_window_minutes: {row['suggested_edit_window_minutes']}")
+        for col in FLAG_COLUMNS:
             if col in row.index:
-                st.text(f"{col}: {row[col]}")
+                st.text(f"{col}: {'Yes' if row[col] else 'No'}")
         if "window_expired" in row.index:
             st.text(f"window_expired: {row['window_expired']}")
 
@@ -174,11 +244,45 @@ def render_detail_panel(
         st.info(f"**Explanation:** {row['explanation']}")
 
 
-def render_export_button(df: pd.DataFrame) -> None:
+def _recommendations_csv(df: pd.DataFrame) -> bytes:
+    """
+    Serialize recommendations to CSV bytes with the Arrow writer.
+    Output matches DataFrame.to_csv: unquoted cells, True/False for window_expired.
+    Falls back to to_csv when a value needs quoting or the installed pyarrow
+    lacks quoting_style.
+    """
+    export = _format_flags(df)
+    if "window_expired" in export.columns:
+        export["window_expired"] = np.where(
+            export["window_expired"].to_numpy(dtype=bool), "True", "False"
+        )
+    columns = [str(c) for c in export.columns]
+    if any(ch in col for col in columns for ch in ',"\n\r'):
+        return export.to_csv(index=False).encode()
+    header = ",".join(columns)
+    table = pa.Table.from_pandas(export, preserve_index=False)
+    buf = io.BytesIO()
+    buf.write(f"{header}\n".encode())
+    try:
+        # Header is written above; quoting_header only exists in newer pyarrow
+        options = pac.WriteOptions(include_header=False, quoting_style="none")
+        pac.write_csv(table, buf, options)
+    except (pa.ArrowInvalid, TypeError):
+        return export.to_csv(index=False).encode()
+    return buf.getvalue()
+
+
+def render_export_button(df: pd.DataFrame, data_key: Optional[int] = None) -> None:
     """Add download button for recommendations CSV."""
     if df is None or df.empty:
         return
-    csv = df.to_csv(index=False)
+    # Reuse the serialized CSV across reruns while recommendations are unchanged
+    if data_key is None:
+        data_key = frame_key(df)
+    if st.session_state.get("_csv_key") != data_key:
+        st.session_state["_csv_bytes"] = _recommendations_csv(df)
+        st.session_state["_csv_key"] = data_key
+    csv = st.session_state["_csv_bytes"]
     st.download_button(
         "Download recommendations as CSV",
         data=csv,